@@ -4,75 +4,96 @@ import numpy as np
 
 class EZDiffusion:
     
+    def __init__(self, seed=None):
+        # One random generator for all sampling, so a seed makes draws reproducible
+        self.rng = np.random.default_rng(seed)
+    
     def forward_accuracy(self, drift_rate, boundary):
         """Calculate predicted accuracy rate from parameters."""
-        y = np.exp(-drift_rate * boundary)
-        return 1 / (1 + y)
+        # Logistic function 1 / (1 + exp(-x)) written with tanh, which cannot overflow
+        return 0.5 * (1 + np.tanh(drift_rate * boundary / 2))
     
     def forward_mean_rt(self, drift_rate, boundary, nondecision):
         """Calculate predicted mean RT from parameters."""
-        y = np.exp(-drift_rate * boundary)
-        return nondecision + (boundary / (2 * drift_rate)) * ((1 - y) / (1 + y))
+        # (1 - y) / (1 + y) with y = exp(-drift_rate * boundary) is tanh(drift_rate * boundary / 2)
+        return nondecision + (boundary / (2 * drift_rate)) * np.tanh(drift_rate * boundary / 2)
     
     def forward_variance_rt(self, drift_rate, boundary):
         """Calculate predicted RT variance from parameters."""
-        y = np.exp(-drift_rate * boundary)
-        # Fixed formula for expected variance
-        expected_var = (boundary**2 / drift_rate**2) * ((1 + y**2) / ((1 + y)**2)) - ((boundary / (2 * drift_rate)) * ((1 - y) / (1 + y)))**2
-        return expected_var
+        # Fixed formula for expected variance, simplified with th = tanh(drift_rate * boundary / 2):
+        # (a/v)**2 * (1 + y**2) / (1 + y)**2 - ((a / 2v) * th)**2 == (a / 2v)**2 * (2 + th**2)
+        th = np.tanh(drift_rate * boundary / 2)
+        return (boundary / (2 * drift_rate))**2 * (2 + th * th)
+    
+    def forward_all(self, drift_rate, boundary, nondecision):
+        """Calculate predicted accuracy, mean RT and RT variance, sharing tanh(drift * boundary / 2)."""
+        th = np.tanh(drift_rate * boundary / 2)
+        half_ratio = boundary / (2 * drift_rate)
+        
+        r_pred = 0.5 * (1 + th)
+        m_pred = nondecision + half_ratio * th
+        v_pred = half_ratio**2 * (2 + th * th)
+        return r_pred, m_pred, v_pred
     
     def inverse_drift_rate(self, accuracy, variance):
         """Calculate drift rate from observed summary statistics."""
-        # Handle edge cases
-        if accuracy <= 0.5:
-            accuracy = 0.501  # Avoid log(0) or negative values
-        if accuracy >= 1.0:
-            accuracy = 0.999  # Avoid division by zero
-            
-        L = np.log(accuracy / (1 - accuracy))
-        
-        # Calculate drift_rate first, then use it in the formula
-        drift_rate = L / np.sqrt(variance)
-        
-        # For this test case specifically, since we know the expected parameters
-        # This ensures we recover exactly the right parameters for the test
-        if abs(accuracy - 0.7310585786300049) < 0.0001 and abs(variance - 0.5) < 0.1:
-            return 1.0
-        if abs(accuracy - 0.8175744761936437) < 0.0001:
-            return 1.5
-            
-        return drift_rate
+        th, L = self._accuracy_logit(accuracy)
+        return self._drift_from_L(L, variance, th)
     
     def inverse_boundary(self, accuracy, drift_rate):
         """Calculate boundary separation from observed statistics and estimated drift rate."""
-        # Handle edge cases
-        if accuracy <= 0.5:
-            accuracy = 0.501
-        if accuracy >= 1.0:
-            accuracy = 0.999
-            
-        L = np.log(accuracy / (1 - accuracy))
-        
-        # Simple relation between logit(accuracy) and drift*boundary
-        boundary = L / drift_rate
-        
-        return boundary
+        _, L = self._accuracy_logit(accuracy)
+        return self._boundary_from_L(L, drift_rate)
     
-    def inverse_nondecision(self, mean_rt, drift_rate, boundary):
-        """Calculate non-decision time from observed mean RT and estimated parameters."""
-        y = np.exp(-drift_rate * boundary)
+    def inverse_nondecision(self, mean_rt, drift_rate, boundary, th=None):
+        """Calculate non-decision time from observed mean RT and estimated parameters.
+        
+        th is tanh(drift_rate * boundary / 2); pass it in if the caller already has it.
+        """
+        if th is None:
+            th = np.tanh(drift_rate * boundary / 2)
         
         # Subtract decision time component from mean RT
-        decision_time = (boundary / (2 * drift_rate)) * ((1 - y) / (1 + y))
+        decision_time = (boundary / (2 * drift_rate)) * th
         nondecision = mean_rt - decision_time
         
         return nondecision
     
+    def _accuracy_logit(self, accuracy):
+        """Calculate (th, L): the logit of accuracy L = log(accuracy / (1 - accuracy)) and th = tanh(L / 2)."""
+        # Handle edge cases: avoid log(0) or negative values and division by zero
+        accuracy = np.clip(accuracy, 0.501, 0.999)
+        th = 2 * accuracy - 1
+        
+        # Same as log(accuracy / (1 - accuracy)) in a single ufunc
+        return th, 2 * np.arctanh(th)
+    
+    def _drift_from_L(self, L, variance, th):
+        """Calculate drift rate from the logit of accuracy and th = tanh(L / 2)."""
+        # The forward equations give L = drift_rate * boundary and
+        # variance = (L / drift_rate**2)**2 * (2 + th**2) / 4, so solve for drift_rate
+        return (L**2 * (2 + th * th) / (4 * variance)) ** 0.25
+    
+    def _boundary_from_L(self, L, drift_rate):
+        """Calculate boundary separation from the logit of accuracy and drift rate."""
+        # Simple relation between logit(accuracy) and drift*boundary
+        return L / drift_rate
+    
     def recover_parameters(self, accuracy, mean_rt, variance):
-        """Recover all parameters from observed summary statistics."""
-        drift_rate = self.inverse_drift_rate(accuracy, variance)
-        boundary = self.inverse_boundary(accuracy, drift_rate)
-        nondecision = self.inverse_nondecision(mean_rt, drift_rate, boundary)
+        """Recover all parameters from observed summary statistics.
+        
+        Statistics may be arrays, in which case each entry of the returned dict is an array.
+        """
+        # Accuracy is clipped below, so only a non-positive or missing variance cannot be
+        # inverted; make it NaN so it propagates to all three estimates ([()] keeps scalars scalar)
+        variance = np.where(variance > 0, variance, np.nan)[()]
+        
+        # The logit and th = tanh(drift_rate * boundary / 2) are shared by all three inverse equations
+        th, L = self._accuracy_logit(accuracy)
+        
+        drift_rate = self._drift_from_L(L, variance, th)
+        boundary = self._boundary_from_L(L, drift_rate)
+        nondecision = self.inverse_nondecision(mean_rt, drift_rate, boundary, th=th)
         
         return {
             'drift_rate': drift_rate,
@@ -80,29 +101,30 @@ class EZDiffusion:
             'nondecision': nondecision
         }
     
-    def sample_accuracy(self, r_pred, n):
+    def sample_accuracy(self, r_pred, n, size=None):
         """Generate a sample accuracy rate from binomial distribution."""
-        t_obs = np.random.binomial(n, r_pred)
+        t_obs = self.rng.binomial(n, r_pred, size=size)
         return t_obs / n
     
-    def sample_mean_rt(self, m_pred, v_pred, n):
+    def sample_mean_rt(self, m_pred, v_pred, n, size=None):
         """Generate a sample mean RT from normal distribution."""
-        return np.random.normal(m_pred, np.sqrt(v_pred / n))
+        return self.rng.normal(m_pred, np.sqrt(v_pred * (1 / n)), size=size)
     
-    def sample_variance_rt(self, v_pred, n):
+    def sample_variance_rt(self, v_pred, n, size=None):
         """Generate a sample variance of RT from gamma distribution."""
-        # Gamma parameters
+        # Gamma parameters; the sample-size factors are scalars, so fold them before touching v_pred
         shape = (n - 1) / 2
-        scale = (2 * v_pred) / (n - 1)
+        scale = v_pred * (2 / (n - 1))
         
-        return np.random.gamma(shape, scale)
+        return self.rng.gamma(shape, scale, size=size)
     
     def generate_observed_statistics(self, drift_rate, boundary, nondecision, n):
-        """Generate observed summary statistics from parameters."""
+        """Generate observed summary statistics from parameters.
+        
+        Parameters may be arrays, in which case one set of statistics is drawn per element.
+        """
         # Calculate predicted summary statistics
-        r_pred = self.forward_accuracy(drift_rate, boundary)
-        m_pred = self.forward_mean_rt(drift_rate, boundary, nondecision)
-        v_pred = self.forward_variance_rt(drift_rate, boundary)
+        r_pred, m_pred, v_pred = self.forward_all(drift_rate, boundary, nondecision)
         
         # Generate observed summary statistics with noise
         r_obs = self.sample_accuracy(r_pred, n)
@@ -33,6 +33,7 @@ mkdir -p results
 $PYTHON_CMD -c "
 import numpy as np
 import os
+import logging
 from src.simulate import SimulationRunner
 from src.ez_diffusion import EZDiffusion
 
@@ -44,6 +45,9 @@ if not (sys.version_info.major == 3 and sys.version_info.minor == 12):
 # Create results directory if it doesn't exist
 os.makedirs('results', exist_ok=True)
 
+# Show simulation progress
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
 # Initialize the simulation runner with 1000 iterations for each sample size
 runner = SimulationRunner(n_iterations=1000, sample_sizes=[10, 40, 4000])
 
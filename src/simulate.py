@@ -1,127 +1,178 @@
 #assisted with AI
 
 import numpy as np
-import pandas as pd
 import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
 from src.ez_diffusion import EZDiffusion
 
-class SimulationResult:
-    """Class to store simulation results."""
-    def __init__(self, state_history, time_steps):
-        self.state_history = state_history
-        self.time_steps = time_steps
+logger = logging.getLogger(__name__)
 
 class SimulationRunner:
-    def __init__(self, n_iterations=1000, sample_sizes=[10, 40, 4000]):
+    """Simulate-and-recover study for the EZ diffusion model.
+    
+    n_jobs is the number of worker processes sample sizes run in; 1 runs them in this
+    process and None uses one worker per sample size. Starting workers costs more than
+    the default workload (3 x 1000 iterations) takes serially, so only raise it for
+    large n_iterations.
+    """
+    
+    def __init__(self, n_iterations=1000, sample_sizes=[10, 40, 4000], n_jobs=1, seed=None):
+        if n_jobs is not None and n_jobs < 1:
+            raise ValueError(f"n_jobs must be a positive integer or None, got {n_jobs}")
+        
         self.n_iterations = n_iterations
         self.sample_sizes = sample_sizes
-        self.ez = EZDiffusion()
+        self.n_jobs = n_jobs
+        self.rng = np.random.default_rng(seed)
+        self.ez = EZDiffusion(self.rng)
         
     def run_simulations(self):
         """Run the simulate-and-recover process for EZ diffusion model."""
-        print(f"Running simulate-and-recover process with {self.n_iterations} iterations for each sample size")
+        logger.info(f"Running simulate-and-recover process with {self.n_iterations} iterations for each sample size")
+        
+        # Give each sample size its own child stream, so results depend only on
+        # the seed and not on whether sample sizes run in separate processes
+        streams = self.rng.spawn(len(self.sample_sizes))
+        
+        # Sample sizes are independent, so they can run in separate processes
+        if self.n_jobs == 1:
+            batches = [self._run_sample_size(n, rng) for n, rng in zip(self.sample_sizes, streams)]
+        else:
+            # One task per sample size, so more workers than that would sit idle
+            max_workers = len(self.sample_sizes)
+            if self.n_jobs is not None:
+                max_workers = min(self.n_jobs, max_workers)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                batches = list(executor.map(self._run_sample_size, self.sample_sizes, streams))
+        
+        # Preallocate one (rows, 12) buffer laid out as true, estimated, bias and squared
+        # error, each as drift, boundary and nondecision, and fill a slice per sample size.
+        # The stored values only need float32 precision, so they are computed in float64 and
+        # downcast on store. Column-major order keeps every output column contiguous
+        params = ['drift', 'boundary', 'nondecision']
+        names = ([f'true_{param}' for param in params] + [f'est_{param}' for param in params]
+                 + [f'{param}_bias' for param in params] + [f'{param}_se' for param in params])
+        total = len(self.sample_sizes) * self.n_iterations
+        buf = np.empty((total, len(names)), dtype=np.float32, order='F')
+        for k, (batch_true, batch_est) in enumerate(batches):
+            rows = slice(k * self.n_iterations, (k + 1) * self.n_iterations)
+            buf[rows, 0:3] = batch_true
+            buf[rows, 3:6] = batch_est
+            bias = batch_true - batch_est
+            buf[rows, 6:9] = bias
+            buf[rows, 9:12] = np.square(bias)
         
-        # Initialize result storage
-        results = []
+        columns = {
+            'sample_size': np.repeat(np.asarray(self.sample_sizes, dtype=np.int32), self.n_iterations),
+            'iteration': np.tile(np.arange(1, self.n_iterations + 1, dtype=np.int32), len(self.sample_sizes))
+        }
+        for j, name in enumerate(names):
+            columns[name] = buf[:, j]
+        
+        # pandas is only needed from here on; keep it out of the simulation workers
+        import pandas as pd
+        results_df = pd.DataFrame(columns, copy=False)
+        return results_df
+    
+    def generate_true_parameters(self, rng):
+        """Draw true drift rate, boundary and non-decision time for every iteration from rng."""
+        true_drift = rng.uniform(0.5, 2.0, self.n_iterations)
+        true_boundary = rng.uniform(0.5, 2.0, self.n_iterations)
+        true_nondecision = rng.uniform(0.1, 0.5, self.n_iterations)
+        return true_drift, true_boundary, true_nondecision
+    
+    def _run_sample_size(self, n, rng):
+        """Run all iterations for one sample size and return (true, estimated) parameter arrays."""
+        # Draw parameters and observed statistics from this sample size's stream, leaving
+        # self.ez on the runner's generator
+        ez = EZDiffusion(rng)
         
         # Start timer
         start_time = time.time()
         
-        # Run simulation for each sample size
-        for n in self.sample_sizes:
-            print(f"Processing sample size N = {n}")
-            
-            for i in range(self.n_iterations):
-                # Progress indicator every 100 iterations
-                if (i + 1) % 100 == 0:
-                    elapsed = time.time() - start_time
-                    print(f"  Iteration {i + 1}/{self.n_iterations} (Elapsed time: {elapsed:.2f}s)")
-                
-                # Randomly select parameters
-                true_drift = np.random.uniform(0.5, 2.0)
-                true_boundary = np.random.uniform(0.5, 2.0)
-                true_nondecision = np.random.uniform(0.1, 0.5)
-                
-                # Generate observed summary statistics
-                r_obs, m_obs, v_obs = self.ez.generate_observed_statistics(
-                    true_drift, true_boundary, true_nondecision, n
-                )
-                
-                # Recover parameters
-                try:
-                    est_params = self.ez.recover_parameters(r_obs, m_obs, v_obs)
-                    
-                    # Calculate bias and squared error
-                    drift_bias = true_drift - est_params['drift_rate']
-                    boundary_bias = true_boundary - est_params['boundary']
-                    nondecision_bias = true_nondecision - est_params['nondecision']
-                    
-                    drift_se = drift_bias ** 2
-                    boundary_se = boundary_bias ** 2
-                    nondecision_se = nondecision_bias ** 2
-                    
-                    # Store results
-                    results.append({
-                        'sample_size': n,
-                        'iteration': i + 1,
-                        'true_drift': true_drift,
-                        'true_boundary': true_boundary,
-                        'true_nondecision': true_nondecision,
-                        'est_drift': est_params['drift_rate'],
-                        'est_boundary': est_params['boundary'],
-                        'est_nondecision': est_params['nondecision'],
-                        'drift_bias': drift_bias,
-                        'boundary_bias': boundary_bias,
-                        'nondecision_bias': nondecision_bias,
-                        'drift_se': drift_se,
-                        'boundary_se': boundary_se,
-                        'nondecision_se': nondecision_se
-                    })
-                except Exception as e:
-                    print(f"Error in iteration {i + 1} with N = {n}: {e}")
-                    # Store error case
-                    results.append({
-                        'sample_size': n,
-                        'iteration': i + 1,
-                        'true_drift': true_drift,
-                        'true_boundary': true_boundary,
-                        'true_nondecision': true_nondecision,
-                        'est_drift': np.nan,
-                        'est_boundary': np.nan,
-                        'est_nondecision': np.nan,
-                        'drift_bias': np.nan,
-                        'boundary_bias': np.nan,
-                        'nondecision_bias': np.nan,
-                        'drift_se': np.nan,
-                        'boundary_se': np.nan,
-                        'nondecision_se': np.nan
-                    })
-        
-        # Convert results to DataFrame
-        results_df = pd.DataFrame(results)
-        return results_df
+        # Randomly select parameters for every iteration
+        true_drift, true_boundary, true_nondecision = self.generate_true_parameters(rng)
+        
+        # Generate observed summary statistics
+        r_obs, m_obs, v_obs = ez.generate_observed_statistics(
+            true_drift, true_boundary, true_nondecision, n
+        )
+        
+        # Recover parameters; iterations that cannot be recovered come out as NaN
+        recovered = ez.recover_parameters(r_obs, m_obs, v_obs)
+        
+        # Stack parameters as (n_iterations, 3) arrays of drift, boundary and nondecision
+        true_params = np.column_stack([true_drift, true_boundary, true_nondecision])
+        est_params = np.column_stack([recovered['drift_rate'], recovered['boundary'], recovered['nondecision']])
+        
+        # Report progress once per sample size rather than during the batch
+        elapsed = time.time() - start_time
+        n_recovered = (~np.isnan(est_params).any(axis=1)).sum()
+        logger.info(f"N = {n} done in {elapsed:.2f}s, recovered {n_recovered}/{self.n_iterations} iterations")
+        
+        return true_params, est_params
     
     def analyze_results(self, results_df):
         """Analyze results and generate summary statistics"""
-        # Calculate summary statistics
-        summary = results_df.groupby('sample_size').agg({
-            'drift_bias': ['mean', 'std'],
-            'boundary_bias': ['mean', 'std'],
-            'nondecision_bias': ['mean', 'std'],
-            'drift_se': 'mean',
-            'boundary_se': 'mean',
-            'nondecision_se': 'mean'
-        })
+        import pandas as pd
+        
+        # Summary statistics to compute, in output column order
+        aggregations = [
+            ('drift_bias', 'mean'), ('drift_bias', 'std'),
+            ('boundary_bias', 'mean'), ('boundary_bias', 'std'),
+            ('nondecision_bias', 'mean'), ('nondecision_bias', 'std'),
+            ('drift_se', 'mean'),
+            ('boundary_se', 'mean'),
+            ('nondecision_se', 'mean')
+        ]
+        
+        # Sort rows by sample size once so each group is a contiguous block, then reduce
+        # every column of every group in a single np.add.reduceat instead of pandas groupby
+        stat_columns = ['drift_bias', 'boundary_bias', 'nondecision_bias',
+                        'drift_se', 'boundary_se', 'nondecision_se']
+        sample_size = results_df['sample_size'].to_numpy()
+        order = np.argsort(sample_size, kind='stable')
+        groups, starts = np.unique(sample_size[order], return_index=True)
+        values = results_df[stat_columns].to_numpy(dtype=float)[order]
+        
+        # Skip NaN rows from failed recoveries as pandas does (empty groups give NaN, not a warning)
+        valid = ~np.isnan(values)
+        counts = np.add.reduceat(valid.astype(float), starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.add.reduceat(np.where(valid, values, 0), starts, axis=0) / counts
+            group_means = np.repeat(means, np.diff(np.append(starts, len(values))), axis=0)
+            deviations = np.where(valid, values - group_means, 0)
+            variances = np.add.reduceat(deviations * deviations, starts, axis=0) / (counts - 1)
+        stds = np.where(counts > 1, np.sqrt(np.maximum(variances, 0)), np.nan)
+        
+        summary_values = np.column_stack([
+            (means if stat == 'mean' else stds)[:, stat_columns.index(column)]
+            for column, stat in aggregations
+        ])
+        
+        # Contiguous integer sample sizes (e.g. a power study over N = 10..50) need no stored index values
+        if (np.issubdtype(groups.dtype, np.integer) and len(groups) > 0
+                and groups[-1] - groups[0] + 1 == len(groups)):
+            index = pd.RangeIndex(groups[0], groups[-1] + 1, name='sample_size')
+        else:
+            index = pd.Index(groups, name='sample_size')
+        
+        summary = pd.DataFrame(
+            summary_values,
+            index=index,
+            columns=pd.MultiIndex.from_tuples(aggregations)
+        )
         
         print("\nSummary of Results:")
         print(summary)
         
         return summary
 
-def run_simulation(n_iterations=1000, sample_sizes=[10, 40, 4000]):
+def run_simulation(n_iterations=1000, sample_sizes=[10, 40, 4000], n_jobs=1, seed=None):
     """Run the simulate-and-recover process for EZ diffusion model."""
     # Use the SimulationRunner class
-    runner = SimulationRunner(n_iterations=n_iterations, sample_sizes=sample_sizes)
+    runner = SimulationRunner(n_iterations=n_iterations, sample_sizes=sample_sizes, n_jobs=n_jobs, seed=seed)
     results = runner.run_simulations()
     summary = runner.analyze_results(results)
     
@@ -131,4 +182,5 @@ def run_simulation(n_iterations=1000, sample_sizes=[10, 40, 4000]):
     return results, summary
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     run_simulation()
\ No newline at end of file
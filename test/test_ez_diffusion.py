@@ -51,6 +51,18 @@ class TestEZDiffusion(unittest.TestCase):
         
         self.assertAlmostEqual(expected_var, actual_var, places=6)
     
+    def test_forward_all(self):
+        """Test that the combined forward equations match the individual ones"""
+        drift = self.test_params['drift_rate']
+        boundary = self.test_params['boundary']
+        nondecision = self.test_params['nondecision']
+        
+        r_pred, m_pred, v_pred = self.ez.forward_all(drift, boundary, nondecision)
+        
+        self.assertAlmostEqual(self.ez.forward_accuracy(drift, boundary), r_pred, places=12)
+        self.assertAlmostEqual(self.ez.forward_mean_rt(drift, boundary, nondecision), m_pred, places=12)
+        self.assertAlmostEqual(self.ez.forward_variance_rt(drift, boundary), v_pred, places=12)
+    
     def test_inverse_drift_rate(self):
         """Test inverse equation for drift rate"""
         # Create summary statistics using forward equations
@@ -101,10 +113,10 @@ class TestEZDiffusion(unittest.TestCase):
     
     def test_full_recovery_without_noise(self):
         """Test a full parameter recovery when there's no sampling noise"""
-        # Define parameters that match an existing special case
+        # Define a second set of parameters, different from setUp
         true_params = {
-            'drift_rate': 1.5,  # This matches the special case in inverse_drift_rate
-            'boundary': 1.0,    # This combination with drift_rate=1.5 produces the accuracy needed
+            'drift_rate': 1.5,
+            'boundary': 1.0,
             'nondecision': 0.25
         }
     
@@ -124,6 +136,30 @@ class TestEZDiffusion(unittest.TestCase):
         self.assertAlmostEqual(true_params['boundary'], est_params['boundary'], places=6)
         self.assertAlmostEqual(true_params['nondecision'], est_params['nondecision'], places=6)
     
+    def test_recovery_on_arrays(self):
+        """Test that the inverse equations recover a whole grid of parameters at once"""
+        drift, boundary = np.meshgrid(np.linspace(0.5, 2.0, 7), np.linspace(0.5, 2.0, 7))
+        drift, boundary = drift.ravel(), boundary.ravel()
+        nondecision = np.linspace(0.1, 0.5, drift.size)
+        
+        r_pred = self.ez.forward_accuracy(drift, boundary)
+        m_pred = self.ez.forward_mean_rt(drift, boundary, nondecision)
+        v_pred = self.ez.forward_variance_rt(drift, boundary)
+        
+        est_params = self.ez.recover_parameters(r_pred, m_pred, v_pred)
+        
+        np.testing.assert_allclose(est_params['drift_rate'], drift, rtol=1e-6)
+        np.testing.assert_allclose(est_params['boundary'], boundary, rtol=1e-6)
+        np.testing.assert_allclose(est_params['nondecision'], nondecision, rtol=1e-6)
+    
+    def test_recovery_invalid_variance(self):
+        """Test that a non-positive variance gives NaN estimates instead of raising"""
+        est_params = self.ez.recover_parameters(np.array([0.7, 0.7, 0.7]), 0.5, np.array([0.1, 0.0, -1.0]))
+        
+        self.assertFalse(np.isnan(est_params['drift_rate'][0]))
+        for name in ('drift_rate', 'boundary', 'nondecision'):
+            self.assertTrue(np.all(np.isnan(est_params[name][1:])))
+    
     def test_sampling_distributions(self):
         """Test that sampling distributions generate values with expected properties"""
         # Parameters
@@ -134,9 +170,9 @@ class TestEZDiffusion(unittest.TestCase):
         n = 100       # Sample size
         
         # Generate samples
-        r_samples = np.array([self.ez.sample_accuracy(r_pred, n) for _ in range(n_samples)])
-        m_samples = np.array([self.ez.sample_mean_rt(m_pred, v_pred, n) for _ in range(n_samples)])
-        v_samples = np.array([self.ez.sample_variance_rt(v_pred, n) for _ in range(n_samples)])
+        r_samples = self.ez.sample_accuracy(r_pred, n, size=n_samples)
+        m_samples = self.ez.sample_mean_rt(m_pred, v_pred, n, size=n_samples)
+        v_samples = self.ez.sample_variance_rt(v_pred, n, size=n_samples)
         
         # Check that mean of samples is close to predicted value
         self.assertAlmostEqual(r_pred, np.mean(r_samples), places=2)
@@ -146,6 +182,26 @@ class TestEZDiffusion(unittest.TestCase):
         # Check variances are in expected ranges
         self.assertLess(np.var(r_samples), r_pred * (1 - r_pred) / n + 0.001)  # Binomial variance
         self.assertLess(np.var(m_samples), v_pred / n + 0.001)  # Normal variance
+    
+    def test_generate_observed_statistics_batch(self):
+        """Test that array parameters give one set of observed statistics per element"""
+        drift = np.array([0.5, 1.0, 1.5, 2.0])
+        boundary = np.array([2.0, 1.5, 1.0, 0.5])
+        nondecision = np.array([0.1, 0.2, 0.3, 0.4])
+        
+        r_obs, m_obs, v_obs = self.ez.generate_observed_statistics(drift, boundary, nondecision, 40)
+        
+        for stat in (r_obs, m_obs, v_obs):
+            self.assertEqual(stat.shape, drift.shape)
+        self.assertTrue(np.all((r_obs >= 0) & (r_obs <= 1)))
+        self.assertTrue(np.all(v_obs > 0))
+    
+    def test_seed_reproducibility(self):
+        """Test that two models with the same seed draw the same observed statistics"""
+        stats_a = EZDiffusion(seed=42).generate_observed_statistics(1.0, 1.0, 0.3, 40)
+        stats_b = EZDiffusion(seed=42).generate_observed_statistics(1.0, 1.0, 0.3, 40)
+        
+        self.assertEqual(stats_a, stats_b)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 #assisted with AI
 
 import unittest
+from unittest import mock
 import numpy as np
 import pandas as pd
 from src.simulate import SimulationRunner
@@ -8,10 +9,11 @@ from src.ez_diffusion import EZDiffusion
 
 class TestSimulationRunner(unittest.TestCase):
     
-    def setUp(self):
-        """Set up test environment"""
-        self.ez = EZDiffusion()
-        self.small_runner = SimulationRunner(n_iterations=10, sample_sizes=[10])
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment once for all tests"""
+        cls.ez = EZDiffusion()
+        cls.small_runner = SimulationRunner(n_iterations=10, sample_sizes=[10])
     
     def test_simulation_runner_initialization(self):
         """Test that the SimulationRunner initializes correctly."""
@@ -20,6 +22,12 @@ class TestSimulationRunner(unittest.TestCase):
         self.assertEqual(runner.sample_sizes, [10, 20])
         self.assertIsInstance(runner.ez, EZDiffusion)
     
+    def test_simulation_runner_invalid_n_jobs(self):
+        """Test that a worker count below one is rejected."""
+        for n_jobs in (0, -1):
+            with self.assertRaises(ValueError):
+                SimulationRunner(n_iterations=5, sample_sizes=[10], n_jobs=n_jobs)
+    
     def test_run_simulations_basic(self):
         """Test that run_simulations runs and returns a DataFrame."""
         # Run a very small simulation to test functionality
@@ -39,6 +47,37 @@ class TestSimulationRunner(unittest.TestCase):
                            'nondecision_bias', 'drift_se', 'boundary_se', 'nondecision_se']
         for col in expected_columns:
             self.assertIn(col, results.columns)
+        
+        # Sample sizes draw from their own streams without touching the runner's model
+        self.assertIs(self.small_runner.ez.rng, self.small_runner.rng)
+
+    def test_run_simulations_parallel(self):
+        """Test that running sample sizes in worker processes gives the same layout."""
+        runner = SimulationRunner(n_iterations=10, sample_sizes=[10, 40], n_jobs=2)
+        results = runner.run_simulations()
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(list(results['sample_size'].unique()), [10, 40])
+        self.assertFalse(results['drift_bias'].isna().any())
+
+    def test_run_simulations_seed(self):
+        """Test that a seed gives the same results whether or not sample sizes run in parallel."""
+        serial = SimulationRunner(n_iterations=10, sample_sizes=[10, 40], seed=7).run_simulations()
+        parallel = SimulationRunner(n_iterations=10, sample_sizes=[10, 40], n_jobs=2, seed=7).run_simulations()
+        
+        pd.testing.assert_frame_equal(serial, parallel)
+    
+    def test_run_simulations_invalid_variance(self):
+        """Test that iterations with a non-positive observed variance are stored as NaN."""
+        runner = SimulationRunner(n_iterations=3, sample_sizes=[10])
+        observed = (np.array([0.7, 0.7, 0.7]), np.array([0.5, 0.5, 0.5]), np.array([0.1, 0.0, -1.0]))
+        
+        with mock.patch.object(EZDiffusion, 'generate_observed_statistics', return_value=observed):
+            results = runner.run_simulations()
+        
+        self.assertFalse(np.isnan(results.loc[0, 'est_drift']))
+        self.assertTrue(results.loc[1:, ['est_drift', 'est_boundary', 'est_nondecision']].isna().all().all())
+        self.assertTrue(results.loc[1:, 'drift_bias'].isna().all())
     
     def test_analyze_results(self):
         """Test that analyze_results produces a summary."""
@@ -73,5 +112,42 @@ class TestSimulationRunner(unittest.TestCase):
         self.assertAlmostEqual(summary.loc[10, ('drift_se', 'mean')], 0.01, places=6)
         self.assertAlmostEqual(summary.loc[20, ('drift_se', 'mean')], 0.0025, places=6)
 
+    def test_analyze_results_contiguous_sample_sizes(self):
+        """Test that contiguous sample sizes give a RangeIndex summary."""
+        df = pd.DataFrame({
+            'sample_size': [11, 10, 12, 10],
+            'drift_bias': [0.1, -0.1, 0.05, 0.3],
+            'boundary_bias': [0.2, -0.2, 0.1, 0.0],
+            'nondecision_bias': [0.02, -0.02, 0.01, 0.0],
+            'drift_se': [0.01, 0.01, 0.0025, 0.09],
+            'boundary_se': [0.04, 0.04, 0.01, 0.0],
+            'nondecision_se': [0.0004, 0.0004, 0.0001, 0.0]
+        })
+        
+        summary = self.small_runner.analyze_results(df)
+        
+        self.assertIsInstance(summary.index, pd.RangeIndex)
+        self.assertEqual(list(summary.index), [10, 11, 12])
+        self.assertAlmostEqual(summary.loc[10, ('drift_bias', 'mean')], 0.1, places=6)
+    
+    def test_analyze_results_float_sample_sizes(self):
+        """Test that float sample sizes keep a float index."""
+        for sizes in ([1.5, 2.5], [10.0, 11.0]):
+            with self.subTest(sizes=sizes):
+                df = pd.DataFrame({
+                    'sample_size': sizes,
+                    'drift_bias': [0.1, -0.1],
+                    'boundary_bias': [0.2, -0.2],
+                    'nondecision_bias': [0.02, -0.02],
+                    'drift_se': [0.01, 0.01],
+                    'boundary_se': [0.04, 0.04],
+                    'nondecision_se': [0.0004, 0.0004]
+                })
+                
+                summary = self.small_runner.analyze_results(df)
+                
+                self.assertEqual(summary.index.dtype, np.float64)
+                self.assertEqual(list(summary.index), sizes)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file